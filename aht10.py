@@ -1,5 +1,25 @@
+import ctypes
+import logging
 import time
-from smbus2 import SMBus
+from smbus2 import SMBus, i2c_msg
+
+log = logging.getLogger(__name__)
+
+def _compute_crc8_entry(byte):
+    """Bit-serial CRC8 (polynomial 0x31) reduction of a single byte."""
+    crc = byte
+    for _ in range(8):
+        crc = ((crc << 1) ^ 0x31) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+# Lookup table so each data byte costs a single index instead of 8 shifts
+_CRC8_TABLE = bytes(_compute_crc8_entry(i) for i in range(256))
+
+def _crc8(data, crc=0xFF):
+    """Calculates the CRC8 (polynomial 0x31, init 0xFF) used by the AHT1x/AHT2x sensors."""
+    for b in data:
+        crc = _CRC8_TABLE[crc ^ b]
+    return crc
 
 class AHT10:
     """
@@ -15,18 +35,40 @@ class AHT10:
     AHT10_CMD_INITIALIZE = [0xBE, 0x08, 0x00]
     AHT10_CMD_MEASURE = [0xAC, 0x33, 0x00]
     AHT10_STATUS_REG = 0x71 # Register to read status byte
+    AHT10_MEASURE_DELAY = 0.08 # Seconds, datasheet conversion time is ~75ms
+    AHT10_RETRY_DELAY = 0.02 # Seconds between status checks if still busy
+    AHT10_MEASURE_RETRIES = 3
+
+    # Conversion factors for the 20-bit raw values (2^20 = 1048576)
+    _HUM_SCALE = 100.0 / 1048576.0
+    _TEMP_SCALE = 200.0 / 1048576.0
+    _TEMP_OFFSET = -50.0
 
-    def __init__(self, i2c_bus_num=1, i2c_address=AHT10_ADDRESS):
+    def __init__(self, i2c_bus_num=1, i2c_address=AHT10_ADDRESS, check_crc=False):
         """
         Initializes the AHT10 sensor object.
 
         Args:
             i2c_bus_num (int): The I2C bus number.
             i2c_address (int): The I2C address of the AHT10.
+            check_crc (bool): Validate the CRC byte of each reading. Only enable for
+                              sensors that send a CRC (e.g. AHT20), original AHT10
+                              parts do not.
         """
         self.i2c_bus_num = i2c_bus_num
         self.i2c_address = i2c_address
+        self.check_crc = check_crc
         self._bus = None
+        self._calibrated = False # Set once the calibration bit has been seen
+        self._init_pending = False # Init command sent, calibration not yet verified
+
+        # Preallocated measurement buffer; the read message points straight at it so
+        # the kernel fills it in place and no new list is created per reading
+        self._buf = bytearray(7)
+        self._read_msg = i2c_msg.read(self.i2c_address, len(self._buf))
+        self._read_msg.buf = ctypes.cast(
+            (ctypes.c_char * len(self._buf)).from_buffer(self._buf), ctypes.POINTER(ctypes.c_char)
+        )
 
         self.open_bus()
 
@@ -47,7 +89,7 @@ class AHT10:
         """Opens the I2C bus connection."""
         try:
             self._bus = SMBus(self.i2c_bus_num)
-            print(f"I2C bus {self.i2c_bus_num} opened.")
+            log.info("I2C bus %d opened.", self.i2c_bus_num)
         except FileNotFoundError:
             raise FileNotFoundError(
                 "I2C bus not found. Make sure I2C is enabled and you have "
@@ -61,7 +103,7 @@ class AHT10:
         if self._bus:
             self._bus.close()
             self._bus = None
-            print(f"I2C bus {self.i2c_bus_num} closed.")
+            log.info("I2C bus %d closed.", self.i2c_bus_num)
 
     def _read_status(self):
         """Reads the AHT10 status byte."""
@@ -72,6 +114,11 @@ class AHT10:
         except Exception as e:
             raise IOError(f"Error reading AHT10 status: {e}")
 
+    def _read_measurement(self):
+        """Reads 7 bytes straight from the device address into the shared buffer."""
+        self._bus.i2c_rdwr(self._read_msg)
+        return self._buf
+
     def is_calibrated(self):
         """Checks if the AHT10 sensor is calibrated."""
         status = self._read_status()
@@ -83,39 +130,47 @@ class AHT10:
         return (status & 0x80) != 0
 
     def initialize_sensor(self):
-        """Initializes the AHT10 sensor."""
+        """
+        Initializes the AHT10 sensor.
+
+        After sending the initialization command the calibration bit is not read back
+        here, it is verified from the status byte of the first measurement instead.
+        """
         if not self._bus:
             raise RuntimeError("I2C bus not open. Call open_bus() first.")
         
+        # Init command already sent, verification is deferred to the first reading
+        if self._init_pending:
+            return True
+
         # Check if already calibrated
-        if self.is_calibrated():
-            print("AHT10 already calibrated.")
+        if self._calibrated or self.is_calibrated():
+            self._calibrated = True
+            log.info("AHT10 already calibrated.")
             return True
 
-        print("AHT10 not calibrated. Initializing...")
+        log.info("AHT10 not calibrated. Initializing...")
         try:
             self._bus.write_i2c_block_data(self.i2c_address, self.AHT10_CMD_INITIALIZE[0], self.AHT10_CMD_INITIALIZE[1:])
             time.sleep(0.01) # Small delay after initialization command
-            
-            # Verify calibration
-            if not self.is_calibrated():
-                print("Failed to initialize AHT10. Calibration bit not set.")
-                return False
-            print("AHT10 initialized successfully.")
+            self._init_pending = True
+            log.info("AHT10 initialization command sent. Calibration is verified on the first reading.")
             return True
         except Exception as e:
-            print(f"Error during AHT10 initialization: {e}")
+            log.error("Error during AHT10 initialization: %s", e)
             return False
 
     def read_raw_data(self, timeout=0.5):
         """
-        Triggers a measurement and reads raw 6 bytes of data from AHT10.
+        Triggers a measurement and reads raw 7 bytes (status, data, CRC) from AHT10.
 
         Args:
-            timeout (float): Maximum time in seconds to wait for measurement.
+            timeout (float): Upper bound in seconds for the retry phase after the
+                             initial measurement delay.
 
         Returns:
-            list: A list of 6 raw bytes if successful, None otherwise.
+            bytearray: The 7 raw bytes if successful, None otherwise. The buffer is
+                       reused by the next read, copy it if it needs to be kept.
         """
         if not self._bus:
             raise RuntimeError("I2C bus not open. Call open_bus() first.")
@@ -124,20 +179,26 @@ class AHT10:
             # Trigger measurement
             self._bus.write_i2c_block_data(self.i2c_address, self.AHT10_CMD_MEASURE[0], self.AHT10_CMD_MEASURE[1:])
 
-            # Wait for measurement to complete
-            start_time = time.time()
-            while self.is_busy():
-                if time.time() - start_time > timeout:
-                    raise TimeoutError(f"AHT10 measurement timeout after {timeout} seconds.")
-                time.sleep(0.01) # Wait 10ms before checking again
-
-            # Read 6 bytes of data
-            # Note: AHT10 does not use registers for data read, just reads from device address
-            # The 0x00 is a dummy register for this sensor with smbus2's read_i2c_block_data
-            data = self._bus.read_i2c_block_data(self.i2c_address, 0x00, 6)
+            # Conversion takes ~75ms per datasheet, so wait that out in one go
+            time.sleep(self.AHT10_MEASURE_DELAY)
+
+            # Read status + 6 data bytes + CRC in one transaction.
+            # Note: AHT10 does not use registers for data read, just reads from device address,
+            # so a plain read message avoids the dummy register write of read_i2c_block_data
+            data = self._read_measurement()
+
+            # Byte 0 is the status byte, only retry in the rare case the sensor is still busy
+            retries = 0
+            while data[0] & 0x80:
+                retries += 1
+                if retries > self.AHT10_MEASURE_RETRIES or retries * self.AHT10_RETRY_DELAY > timeout:
+                    raise TimeoutError(f"AHT10 measurement timeout after {retries - 1} retries.")
+                time.sleep(self.AHT10_RETRY_DELAY)
+                data = self._read_measurement()
+
             return data
         except Exception as e:
-            print(f"Error reading raw AHT10 data: {e}")
+            log.error("Error reading raw AHT10 data: %s", e)
             return None
 
     def get_humidity_temperature(self):
@@ -149,20 +210,37 @@ class AHT10:
                    Returns (None, None) if data reading or conversion fails.
         """
         raw_data = self.read_raw_data()
-        if raw_data is None or len(raw_data) != 6:
+        if raw_data is None or len(raw_data) != 7:
+            return None, None
+
+        if self.check_crc and _crc8(memoryview(raw_data)[:6]) != raw_data[6]:
+            log.warning("AHT10 CRC mismatch, discarding reading.")
             return None, None
 
+        # Deferred calibration check from initialize_sensor(), using the status byte of this reading
+        if not self._calibrated:
+            self._init_pending = False
+            if not raw_data[0] & 0x08:
+                log.error("AHT10 calibration bit not set. Reinitializing.")
+                try:
+                    self.initialize_sensor()
+                except Exception as e:
+                    log.warning("Error reinitializing AHT10: %s", e)
+                return None, None
+            self._calibrated = True
+
         # raw_data[0] is the status byte (bit 7 is busy, bit 3 is calibrated)
         # raw_data[1], raw_data[2], raw_data[3] (upper 4 bits) are humidity
         # raw_data[3] (lower 4 bits), raw_data[4], raw_data[5] are temperature
+        # raw_data[6] is the CRC byte
 
         # Combine bytes to get raw humidity (20-bit value)
         raw_humidity = ((raw_data[1] << 16) | (raw_data[2] << 8) | raw_data[3]) >> 4
-        humidity = (raw_humidity / 1048576.0) * 100.0 # 2^20 = 1048576
+        humidity = raw_humidity * self._HUM_SCALE
 
         # Combine bytes to get raw temperature (20-bit value)
         raw_temperature = (((raw_data[3] & 0x0F) << 16) | (raw_data[4] << 8) | raw_data[5])
-        temperature = (raw_temperature / 1048576.0) * 200.0 - 50.0 # 2^20 = 1048576
+        temperature = raw_temperature * self._TEMP_SCALE + self._TEMP_OFFSET
 
         return humidity, temperature
 
@@ -0,0 +1,48 @@
+import numpy as np
+from numba import njit
+
+from dew_point_calc import A, B
+
+# Same conversion factors as AHT10, duplicated so replaying logs does not need smbus2
+_HUM_SCALE = 100.0 / 1048576.0
+_TEMP_SCALE = 200.0 / 1048576.0
+_TEMP_OFFSET = -50.0
+
+@njit(cache=True)
+def decode_batch(raw):
+    """
+    Decodes a batch of raw AHT10 measurement frames.
+
+    Args:
+        raw (numpy.ndarray): (N, 7) uint8 array of frames as returned by AHT10.read_raw_data().
+
+    Returns:
+        numpy.ndarray: (N, 3) float32 array of (humidity %RH, temperature °C, dew point °C).
+                       The dew point is NaN for readings with 0% humidity.
+    """
+    n = raw.shape[0]
+    out = np.empty((n, 3), dtype=np.float32)
+    for i in range(n):
+        b1 = np.int64(raw[i, 1])
+        b2 = np.int64(raw[i, 2])
+        b3 = np.int64(raw[i, 3])
+        b4 = np.int64(raw[i, 4])
+        b5 = np.int64(raw[i, 5])
+
+        # Same bit layout as AHT10.get_humidity_temperature()
+        raw_humidity = ((b1 << 16) | (b2 << 8) | b3) >> 4
+        raw_temperature = ((b3 & 0x0F) << 16) | (b4 << 8) | b5
+        humidity = raw_humidity * _HUM_SCALE
+        temperature = raw_temperature * _TEMP_SCALE + _TEMP_OFFSET
+
+        # Magnus formula, see dew_point_calc.calculate_dew_point()
+        if humidity > 0.0:
+            gamma = np.log(humidity / 100.0) + (A * temperature) / (B + temperature)
+            dew_point = (B * gamma) / (A - gamma)
+        else:
+            dew_point = np.nan
+
+        out[i, 0] = humidity
+        out[i, 1] = temperature
+        out[i, 2] = dew_point
+    return out
@@ -0,0 +1,43 @@
+import logging
+
+import lgpio
+
+log = logging.getLogger(__name__)
+
+class AlertInput:
+    """
+    A class to watch a sensor ALERT line (e.g. SHT3x) on a Raspberry Pi GPIO pin.
+
+    The callback runs on lgpio's notification thread whenever the line becomes active.
+    """
+    def __init__(self, gpio_pin, on_alert, active_high=True):
+        self.gpio_pin = gpio_pin
+        self.active_high = active_high # True if the ALERT line goes HIGH when triggered
+        self._on_alert = on_alert
+
+        edge = lgpio.RISING_EDGE if self.active_high else lgpio.FALLING_EDGE
+        self._h = lgpio.gpiochip_open(0)
+        try:
+            lgpio.gpio_claim_alert(self._h, self.gpio_pin, edge)
+            self._callback = lgpio.callback(self._h, self.gpio_pin, edge, self._handle_edge)
+        except Exception:
+            lgpio.gpiochip_close(self._h)
+            raise
+
+        log.info("Alert input initialized on GPIO BCM %d.", self.gpio_pin)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.cleanup()
+        log.info("Alert input on GPIO BCM %d cleaned up.", self.gpio_pin)
+
+    def _handle_edge(self, chip, gpio, level, timestamp):
+        self._on_alert()
+
+    def cleanup(self):
+        """Cancels the edge callback and releases the GPIO pin and chip handle."""
+        self._callback.cancel()
+        lgpio.gpio_free(self._h, self.gpio_pin)
+        lgpio.gpiochip_close(self._h)
@@ -1,9 +1,26 @@
+import logging
 import math
+from functools import lru_cache
+
+import numpy as np
+
+# Bound at module level to avoid attribute lookups on every call
+_exp = math.exp
+_log = math.log
+
+log = logging.getLogger(__name__)
+
+# Constants for Magnus formula (typically valid for -30C to +35C)
+# These constants are specific to the formula's coefficients.
+A = 17.27
+B = 237.7 # degrees Celsius
 
 def calculate_dew_point(temperature_celsius, relative_humidity):
     """
     Calculates the dew point temperature in Celsius using the Magnus formula approximation.
 
+    Inputs are rounded to 0.1 so repeated readings of an idle room hit the cache.
+
     Args:
         temperature_celsius (float): Ambient temperature in degrees Celsius.
         relative_humidity (float): Relative humidity in percentage (0-100%).
@@ -11,24 +28,35 @@ def calculate_dew_point(temperature_celsius, relative_humidity):
     Returns:
         float: Dew point temperature in degrees Celsius, or None if inputs are invalid.
     """
+    if temperature_celsius is None or relative_humidity is None:
+        return None
+
     if not (0 <= relative_humidity <= 100):
-        print("Warning: Relative humidity must be between 0 and 100%.")
+        log.warning("Relative humidity must be between 0 and 100%.")
         return None
-    
+
     if not (-50 <= temperature_celsius <= 50):
-        print("Warning: Temperature outside typical range for this calculation.")
+        log.warning("Temperature outside typical range for this calculation.")
+
+    temperature_celsius = round(temperature_celsius, 1)
+    relative_humidity = round(relative_humidity, 1)
+
+    # Dew point is undefined at 0% humidity (log(0)), this also catches values that round down to it
+    if relative_humidity <= 0:
+        log.warning("Relative humidity too low to calculate dew point.")
+        return None
 
-    # Constants for Magnus formula (typically valid for -30C to +35C)
-    # These constants are specific to the formula's coefficients.
-    A = 17.27
-    B = 237.7 # degrees Celsius
+    return _cached_dew_point(temperature_celsius, relative_humidity)
 
+@lru_cache(maxsize=64)
+def _cached_dew_point(temperature_celsius, relative_humidity):
+    """Magnus formula for already validated and rounded inputs."""
     # Convert RH to a fraction (0 to 1)
     rh_fraction = relative_humidity / 100.0
 
     # Calculate saturation vapor pressure (es)
     # es = 6.112 * exp((A * T) / (B + T))
-    es = 6.112 * math.exp((A * temperature_celsius) / (B + temperature_celsius))
+    es = 6.112 * _exp((A * temperature_celsius) / (B + temperature_celsius))
 
     # Calculate actual vapor pressure (e)
     e = rh_fraction * es
@@ -36,8 +64,31 @@ def calculate_dew_point(temperature_celsius, relative_humidity):
     # Calculate dew point (Td)
     # Td = (B * ln(e / 6.112)) / (A - ln(e / 6.112))
     # It's often re-arranged to simplify the intermediate calculation:
-    gamma = math.log(e / 6.112) # Use natural logarithm (ln)
+    gamma = _log(e / 6.112) # Use natural logarithm (ln)
 
     dew_point = (B * gamma) / (A - gamma)
 
     return dew_point
+
+def calculate_dew_points(temperature_celsius, relative_humidity):
+    """
+    Vectorized Magnus formula for a batch of readings.
+
+    Args:
+        temperature_celsius (array-like): Ambient temperatures in degrees Celsius.
+        relative_humidity (array-like): Relative humidities in percentage (0-100%).
+
+    Returns:
+        numpy.ndarray: Dew point temperatures in degrees Celsius, NaN where the
+                       humidity is 0% or below (see calculate_dew_point()).
+    """
+    temperature_celsius = np.asarray(temperature_celsius, dtype=float)
+    relative_humidity = np.asarray(relative_humidity, dtype=float)
+
+    # Dew point is undefined at 0% humidity (log(0)), mask those out instead of taking the log
+    valid = relative_humidity > 0
+    rh_fraction = np.where(valid, relative_humidity, 100.0) / 100.0
+
+    es = 6.112 * np.exp((A * temperature_celsius) / (B + temperature_celsius))
+    gamma = np.log(rh_fraction * es / 6.112)
+    return np.where(valid, (B * gamma) / (A - gamma), np.nan)
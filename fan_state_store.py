@@ -0,0 +1,115 @@
+import logging
+import mmap
+import os
+import struct
+import time
+
+log = logging.getLogger(__name__)
+
+class FanStateStore:
+    """
+    Persists fan state changes to a small memory-mapped ring buffer file.
+
+    Each record holds a sequence number, the wall clock time of the change and
+    the fan state, so the newest record can be found again after a restart.
+
+    Attributes:
+        path (str): Path of the ring buffer file.
+        sync_every (int): Number of writes between flushes to disk.
+    """
+
+    RECORD_FORMAT = "<IdB3x" # sequence, timestamp, state, padding to 16 bytes
+    RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+    RECORD_COUNT = 8
+
+    def __init__(self, path, sync_every=8):
+        """
+        Opens (or creates) the ring buffer file.
+
+        Args:
+            path (str): Path of the ring buffer file.
+            sync_every (int): Number of writes between flushes to disk. The mapped
+                              pages survive a process crash either way, flushing
+                              only guards against power loss.
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self._mm = None
+        self._seq = 0
+        self._index = 0
+        self._unsynced = 0
+
+        size = self.RECORD_SIZE * self.RECORD_COUNT
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd) # The mapping keeps its own reference
+
+        newest = self._newest_slot()
+        if newest is not None:
+            self._seq = self._read_slot(newest)[0]
+            self._index = (newest + 1) % self.RECORD_COUNT
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _read_slot(self, index):
+        return struct.unpack_from(self.RECORD_FORMAT, self._mm, index * self.RECORD_SIZE)
+
+    def _newest_slot(self):
+        """Returns the index of the record with the highest sequence number, or None if empty."""
+        newest, newest_seq = None, 0
+        for index in range(self.RECORD_COUNT):
+            seq = self._read_slot(index)[0]
+            if seq > newest_seq:
+                newest, newest_seq = index, seq
+        return newest
+
+    def record(self, fan_on, timestamp=None):
+        """
+        Appends a fan state change to the ring buffer.
+
+        Args:
+            fan_on (bool): New fan state.
+            timestamp (float): Wall clock time of the change, defaults to now.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self._seq += 1
+        struct.pack_into(self.RECORD_FORMAT, self._mm, self._index * self.RECORD_SIZE,
+                         self._seq, timestamp, 1 if fan_on else 0)
+        self._index = (self._index + 1) % self.RECORD_COUNT
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self._mm.flush()
+            self._unsynced = 0
+
+    def latest(self):
+        """
+        Gets the most recent fan state change.
+
+        Returns:
+            tuple: (fan_on, timestamp), or None if nothing was recorded yet.
+        """
+        newest = self._newest_slot()
+        if newest is None:
+            return None
+        _, timestamp, state = self._read_slot(newest)
+        return state == 1, timestamp
+
+    def close(self):
+        """Flushes pending writes and unmaps the file."""
+        if self._mm:
+            self._mm.flush()
+            self._mm.close()
+            self._mm = None
@@ -1,11 +1,19 @@
+import asyncio
+import logging
+from logging.handlers import MemoryHandler
+
 from ventController import VentController
 
+log = logging.getLogger(__name__)
+
 def main():
     # --- CONFIGURATION ---
     # Adjust these parameters for your setup and preferences
     AHT10_I2C_BUS = 1            # Typically 1 for Raspberry Pi
+    CHECK_CRC = False            # Set to True if your sensor sends a CRC byte (e.g. AHT20), the AHT10 does not
     RELAY_GPIO_PIN = 14          # BCM GPIO pin number (Physical Pin 8)
     RELAY_ACTIVE_HIGH = True     # Set to False if your relay is ACTIVE-LOW (most common)
+    ALERT_GPIO_PIN = None        # BCM GPIO pin of a sensor ALERT output (e.g. SHT3x), None to only poll
 
     # Dew Point Control Parameters
     DEW_POINT_THRESHOLD = 19.0   # Degrees Celsius
@@ -16,44 +24,54 @@ def main():
     MAX_FAN_RUN_TIME = 60 * 60   # 1 hour in seconds
 
     SENSOR_READ_INTERVAL = 10    # Read sensor and evaluate every 10 seconds
+    MAX_SENSOR_READ_INTERVAL = 5 * 60 # Back off up to 5 minutes while the room is idle
+
+    LOG_LEVEL = logging.INFO     # Set to logging.DEBUG to log every sensor reading
     # --- END CONFIGURATION ---
 
-    print("Starting Bathroom Vent Controller application...")
-    print("---------------------------------------------")
-    print(f"Config: DP Threshold: {DEW_POINT_THRESHOLD}°C, Hysteresis: {HYSTERESIS}°C")
-    print(f"Config: Min Run Time: {MIN_FAN_RUN_TIME/60}min, Max Run Time: {MAX_FAN_RUN_TIME/60}min")
-    print(f"Config: Sensor Read Interval: {SENSOR_READ_INTERVAL}s")
-    print("---------------------------------------------")
+    # Buffer log records and write them out in batches (flushed immediately on warnings and errors)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logging.basicConfig(level=LOG_LEVEL, handlers=[MemoryHandler(capacity=32, flushLevel=logging.WARNING, target=stream_handler)])
+
+    log.info("Starting Bathroom Vent Controller application...")
+    log.info("Config: DP Threshold: %s°C, Hysteresis: %s°C", DEW_POINT_THRESHOLD, HYSTERESIS)
+    log.info("Config: Min Run Time: %smin, Max Run Time: %smin", MIN_FAN_RUN_TIME/60, MAX_FAN_RUN_TIME/60)
+    log.info("Config: Sensor Read Interval: %ss (up to %ss when idle)", SENSOR_READ_INTERVAL, MAX_SENSOR_READ_INTERVAL)
 
     controller = None
     try:
         with VentController(
             aht10_bus_num=AHT10_I2C_BUS,
+            aht10_check_crc=CHECK_CRC,
             relay_gpio_pin=RELAY_GPIO_PIN,
             relay_active_high=RELAY_ACTIVE_HIGH,
+            alert_gpio_pin=ALERT_GPIO_PIN,
             dew_point_threshold_c=DEW_POINT_THRESHOLD,
             hysteresis_c=HYSTERESIS,
             min_fan_runtime_seconds=MIN_FAN_RUN_TIME,
             max_fan_runtime_seconds=MAX_FAN_RUN_TIME,
-            sensor_read_interval_seconds=SENSOR_READ_INTERVAL
+            sensor_read_interval_seconds=SENSOR_READ_INTERVAL,
+            max_sensor_read_interval_seconds=MAX_SENSOR_READ_INTERVAL
         ) as controller:
-            controller.start() # This will run until Ctrl+C
+            asyncio.run(controller.start()) # This will run until Ctrl+C
 
+    except KeyboardInterrupt:
+        log.info("Ctrl+C detected. Stopping controller.")
     except FileNotFoundError as e:
-        print(f"\nCRITICAL ERROR: {e}")
-        print("Ensure I2C is enabled (`sudo raspi-config`) and your user has permissions (`sudo adduser $USER i2c` then reboot).")
+        log.critical("%s", e)
+        log.critical("Ensure I2C is enabled (`sudo raspi-config`) and your user has permissions (`sudo adduser $USER i2c` then reboot).")
     except ImportError as e:
-        print(f"\nCRITICAL ERROR: Missing library. {e}")
-        print("Please ensure 'smbus2' and 'RPi.GPIO' are installed (`pip install smbus2 RPi.GPIO`).")
+        log.critical("Missing library. %s", e)
+        log.critical("Please ensure the requirements are installed (`pip install -r requirements.txt`).")
     except RuntimeError as e:
-        print(f"\nCRITICAL ERROR: Controller setup issue: {e}")
+        log.critical("Controller setup issue: %s", e)
     except Exception as e:
-        print(f"\nAN UNEXPECTED ERROR OCCURRED: {e}")
-        import traceback
-        traceback.print_exc() # Print full traceback for unexpected errors
+        log.exception("An unexpected error occurred: %s", e) # Logs full traceback for unexpected errors
     finally:
-        print("\nApplication exiting.")
+        log.info("Application exiting.")
         # The 'with' statement handles controller.__exit__ for cleanup automatically
+        logging.shutdown() # Flush any buffered log records
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,27 @@
+import argparse
+import sys
+
+import numpy as np
+
+from aht10_kernel import decode_batch
+
+FRAME_SIZE = 7 # Raw AHT10 frame: status, 5 data bytes, CRC
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode a log of raw AHT10 frames to humidity, temperature and dew point.")
+    parser.add_argument("path", nargs="?", default="/var/log/vent/readings.bin",
+                        help="File of concatenated 7-byte AHT10 frames (default: %(default)s)")
+    args = parser.parse_args()
+
+    raw = np.fromfile(args.path, dtype=np.uint8)
+    if raw.size % FRAME_SIZE:
+        print(f"Warning: Ignoring {raw.size % FRAME_SIZE} trailing bytes of incomplete frame.", file=sys.stderr)
+        raw = raw[:raw.size - raw.size % FRAME_SIZE]
+    readings = decode_batch(raw.reshape(-1, FRAME_SIZE))
+
+    print("humidity,temperature,dew_point")
+    for humidity, temperature, dew_point in readings:
+        print(f"{humidity:.2f},{temperature:.2f},{dew_point:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,42 @@
 from aht10 import AHT10
 from relay import Relay
-from dew_point_calc import calculate_dew_point
+from dew_point_calc import calculate_dew_point, calculate_dew_points
+from fan_state_store import FanStateStore
+from alert_input import AlertInput
+import asyncio
+import logging
 import time
+from collections import deque
+from itertools import product
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+def _decide_fan_action(fan_on, above_threshold, projected_above_threshold,
+                       under_min_runtime, over_max_runtime, below_hysteresis):
+    """
+    Fan control rules, evaluated once per input combination to build VentController._DECISION.
+
+    Returns:
+        tuple: (action, reason) where action is 'on', 'off' or 'hold'.
+    """
+    if not fan_on:
+        if above_threshold:
+            return "on", "threshold"
+        if projected_above_threshold:
+            return "on", "trend"
+        return "hold", "below_threshold"
+
+    if under_min_runtime:
+        return "hold", "min_runtime" # Let it run for min time
+    if over_max_runtime:
+        return "off", "max_runtime"
+    if below_hysteresis:
+        return "off", "hysteresis"
+    # Fan is ON, within min/max runtime, and DP is between threshold and hysteresis
+    return "hold", "in_hysteresis"
 
 
 class VentController:
@@ -9,20 +44,44 @@ class VentController:
     Controls a bathroom vent fan based on AHT10 sensor readings and dew point.
     """
 
+    TREND_SAMPLES = 5 # Most recent readings the dew point trend slope is fitted over
+
+    # (fan_on, above_threshold, projected_above_threshold, under_min_runtime,
+    #  over_max_runtime, below_hysteresis) -> (action, reason)
+    _DECISION = {inputs: _decide_fan_action(*inputs) for inputs in product((False, True), repeat=6)}
+
+    # reason -> (log level, message), formatted with the values built in _evaluate_fan_state
+    _DECISION_LOG = {
+        "threshold": (logging.INFO, "Controller: Dew Point (%(dp).2f°C) > Threshold (%(threshold).1f°C). Turning fan ON."),
+        "trend": (logging.INFO, "Controller: Dew Point (%(dp).2f°C) rising %(slope_per_min).2f°C/min, projected above Threshold (%(threshold).1f°C). Turning fan ON."),
+        "below_threshold": (logging.DEBUG, "Controller: DP (%(dp).2f°C) below threshold. Fan remains OFF."),
+        "min_runtime": (logging.DEBUG, "Controller: Fan ON (Min runtime: %(min_left)ds left). DP: %(dp).2f°C"),
+        "max_runtime": (logging.INFO, "Controller: Max fan runtime (%(max_runtime)ss) reached. Turning fan OFF (DP: %(dp).2f°C)."),
+        "hysteresis": (logging.INFO, "Controller: Dew Point (%(dp).2f°C) < (Threshold - Hysteresis) (%(off_threshold).1f°C). Turning fan OFF."),
+        "in_hysteresis": (logging.DEBUG, "Controller: Fan ON. DP (%(dp).2f°C) within hysteresis range."),
+    }
+
     def __init__(self,
                  aht10_bus_num=1,
+                 aht10_check_crc=False, # Original AHT10 parts do not send a CRC
                  relay_gpio_pin=14,
                  relay_active_high=True, # Set to False if your relay is active-low
                  dew_point_threshold_c=16.0, # e.g., 16C
                  hysteresis_c=2.0,           # Fan stays on until DP drops by this much
                  min_fan_runtime_seconds=300, # 5 minutes
                  max_fan_runtime_seconds=3600, # 1 hour
-                 sensor_read_interval_seconds=10):
+                 sensor_read_interval_seconds=10,
+                 max_sensor_read_interval_seconds=300, # 5 minutes
+                 state_path="/var/lib/vent/state.bin",
+                 dew_point_lookahead_seconds=60,
+                 alert_gpio_pin=None,
+                 alert_active_high=True):
         """
         Initializes the VentController.
 
         Args:
             aht10_bus_num (int): I2C bus number for AHT10.
+            aht10_check_crc (bool): Validate the CRC byte of each reading (only for sensors that send one).
             relay_gpio_pin (int): BCM GPIO pin for the relay.
             relay_active_high (bool): True if relay turns ON with HIGH signal, False for LOW.
             dew_point_threshold_c (float): Dew point in Celsius to turn fan ON.
@@ -30,8 +89,17 @@ class VentController:
             min_fan_runtime_seconds (int): Minimum time fan must run once activated.
             max_fan_runtime_seconds (int): Maximum time fan can run.
             sensor_read_interval_seconds (int): How often to read sensor and evaluate.
+            max_sensor_read_interval_seconds (int): Upper bound the read interval backs off to
+                                                    while the fan is OFF and the dew point is stable.
+            state_path (str): File used to persist fan state across restarts, None to disable.
+            dew_point_lookahead_seconds (int): Turn the fan ON early if the dew point trend is projected
+                                               to cross the threshold within this time, 0 to disable.
+            alert_gpio_pin (int): BCM GPIO pin wired to a humidity sensor ALERT output (e.g. SHT3x).
+                                  An alert triggers an immediate reading. None to only poll.
+            alert_active_high (bool): True if the ALERT line goes HIGH when triggered, False for LOW.
         """
         self.aht10_bus_num = aht10_bus_num
+        self.aht10_check_crc = aht10_check_crc
         self.relay_gpio_pin = relay_gpio_pin
         self.relay_active_high = relay_active_high
 
@@ -40,19 +108,35 @@ class VentController:
         self.min_fan_runtime_seconds = min_fan_runtime_seconds
         self.max_fan_runtime_seconds = max_fan_runtime_seconds
         self.sensor_read_interval_seconds = sensor_read_interval_seconds
+        self.max_sensor_read_interval_seconds = max_sensor_read_interval_seconds
+        self.state_path = state_path
+        self.dew_point_lookahead_seconds = dew_point_lookahead_seconds
+        self.alert_gpio_pin = alert_gpio_pin
+        self.alert_active_high = alert_active_high
 
         self.sensor = None  # AHT10 instance
         self.relay = None   # Relay instance
+        self.state_store = None # FanStateStore instance
+        self.alert = None   # AlertInput instance
 
-        self.fan_on_timestamp = 0  # To track fan run time
+        self.fan_on_timestamp = 0  # time.monotonic() when the fan was turned on
         self._running = False      # Control loop state
 
-        print("VentController initialized. Ready to start.")
+        self._last_dp = None       # Dew point of the previous reading
+        self._interval = sensor_read_interval_seconds # Current (adaptive) read interval
+
+        self._history = deque(maxlen=self.TREND_SAMPLES) # (time.monotonic(), temperature, humidity)
+        self._dp_slope = None      # Dew point trend in °C per second
+
+        self._loop = None          # Event loop running start(), set while running
+        self._alert_event = None   # Set from the alert callback to wake the main loop
+
+        log.info("VentController initialized. Ready to start.")
 
     def __enter__(self):
         """Context manager entry point: opens sensor and relay connections."""
         try:
-            self.sensor = AHT10(self.aht10_bus_num)
+            self.sensor = AHT10(self.aht10_bus_num, check_crc=self.aht10_check_crc)
             self.sensor.__enter__() # Manually call __enter__ for contained objects
 
             self.relay = Relay(self.relay_gpio_pin, initial_state="off", active_high=self.relay_active_high)
@@ -60,37 +144,59 @@ class VentController:
 
             # Ensure fan is off at startup
             self.relay.off()
-            print("Controller: Sensors and Relay initialized. Fan is OFF.")
+            log.info("Controller: Sensors and Relay initialized. Fan is OFF.")
+
+            if self.state_path:
+                try:
+                    self.state_store = FanStateStore(self.state_path)
+                    self._restore_fan_state()
+                except OSError as e:
+                    log.warning("Controller: Fan state persistence disabled: %s", e)
+                    self.state_store = None
+
+            if self.alert_gpio_pin is not None:
+                self.alert = AlertInput(self.alert_gpio_pin, self._on_alert, active_high=self.alert_active_high)
+                self.alert.__enter__() # Manually call __enter__ for contained objects
             return self
         except Exception as e:
-            print(f"Controller initialization failed: {e}")
+            log.error("Controller initialization failed: %s", e)
             self.__exit__(None, None, None) # Ensure cleanup if init fails
             raise
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit point: cleans up sensor and relay connections."""
-        print("Controller: Cleaning up resources...")
+        log.info("Controller: Cleaning up resources...")
         self.stop() # Ensure main loop is stopped
 
+        if self.alert:
+            self.alert.__exit__(exc_type, exc_val, exc_tb)
+            self.alert = None
         if self.relay:
             self.relay.__exit__(exc_type, exc_val, exc_tb)
             self.relay = None
         if self.sensor:
             self.sensor.__exit__(exc_type, exc_val, exc_tb)
             self.sensor = None
-        
-        # This is very important if RPi.GPIO was set up
-        # If no other GPIO is in use by another class/module,
-        # it's good practice to call global cleanup if needed.
-        # But since Relay class's __exit__ does cleanup for its pin,
-        # and __main__ block ensures context manager for Controller,
-        # global cleanup might not be strictly necessary here if only one Relay object exists.
-        # However, calling it generally ensures all pins are reset.
-        try:
-            GPIO.cleanup()
-            print("Controller: RPi.GPIO global cleanup performed.")
-        except Exception as e:
-            print(f"Controller: Error during global GPIO cleanup: {e}")
+        if self.state_store:
+            self.state_store.close()
+            self.state_store = None
+
+    def _restore_fan_state(self):
+        """Resumes a fan cycle that was interrupted by a restart, if still within max runtime."""
+        latest = self.state_store.latest()
+        if latest is None:
+            return
+        fan_on, timestamp = latest
+        elapsed = time.time() - timestamp # Wall clock, monotonic time does not survive a reboot
+        if fan_on and 0 <= elapsed < self.max_fan_runtime_seconds:
+            self.relay.on()
+            self.fan_on_timestamp = time.monotonic() - elapsed
+            log.info("Controller: Resuming fan cycle started %ds ago. Fan is ON.", elapsed)
+
+    def _record_fan_state(self, fan_on):
+        """Persists a fan state change if a state store is configured."""
+        if self.state_store:
+            self.state_store.record(fan_on)
 
 
     def _evaluate_fan_state(self, temp, rh, current_dp):
@@ -98,68 +204,126 @@ class VentController:
         
         # Check if sensor data is valid
         if temp is None or rh is None or current_dp is None:
-            print("Controller: Invalid sensor data, maintaining current fan state.")
+            log.warning("Controller: Invalid sensor data, maintaining current fan state.")
             return
 
-        fan_is_on = self.relay.get_state() == "on"
-        current_time = time.time()
+        now = time.monotonic() # Immune to wall clock jumps
+        elapsed = now - self.fan_on_timestamp
+        slope = self._dp_slope if self._dp_slope is not None and self._dp_slope > 0 else 0.0
+        projected_dp = current_dp + slope * self.dew_point_lookahead_seconds
+        off_threshold = self.dew_point_threshold_c - self.hysteresis_c
+
+        action, reason = self._DECISION[(
+            self.relay.is_on,
+            current_dp > self.dew_point_threshold_c,
+            projected_dp > self.dew_point_threshold_c,
+            elapsed < self.min_fan_runtime_seconds,
+            elapsed > self.max_fan_runtime_seconds,
+            current_dp < off_threshold,
+        )]
+
+        if action != "hold":
+            getattr(self.relay, action)()
+            self.fan_on_timestamp = now if action == "on" else 0 # Reset when turned off
+            self._record_fan_state(action == "on")
 
-        # If fan is currently OFF
-        if not fan_is_on:
-            if current_dp > self.dew_point_threshold_c:
-                self.relay.on()
-                self.fan_on_timestamp = current_time
-                print(f"Controller: Dew Point ({current_dp:.2f}°C) > Threshold ({self.dew_point_threshold_c:.1f}°C). Turning fan ON.")
-            else:
-                print(f"Controller: DP ({current_dp:.2f}°C) below threshold. Fan remains OFF.")
-                pass
+        level, message = self._DECISION_LOG[reason]
+        log.log(level, message, {
+            "dp": current_dp,
+            "threshold": self.dew_point_threshold_c,
+            "off_threshold": off_threshold,
+            "slope_per_min": slope * 60,
+            "min_left": self.min_fan_runtime_seconds - elapsed,
+            "max_runtime": self.max_fan_runtime_seconds,
+        })
 
-        # If fan is currently ON
+    def _update_trend(self, temp, rh, current_dp):
+        """Adds a reading to the history and refits the dew point slope over it."""
+        # Skip readings calculate_dew_point() rejected, they would poison the fit with NaN
+        if current_dp is None:
+            return
+        self._history.append((time.monotonic(), temp, rh))
+        if len(self._history) < self.TREND_SAMPLES:
+            self._dp_slope = None
+            return
+
+        timestamps, temperatures, humidities = np.asarray(self._history).T
+        dew_points = calculate_dew_points(temperatures, humidities)
+        self._dp_slope = np.polyfit(timestamps - timestamps[0], dew_points, 1)[0]
+
+    def _update_interval(self, current_dp):
+        """
+        Backs off the read interval while the room is idle, snaps back on any change.
+
+        The interval grows by 1.5x (up to max_sensor_read_interval_seconds) while the fan is OFF,
+        the dew point moved less than 0.3°C and it is well below the threshold.
+        """
+        stable = (
+            current_dp is not None
+            and self._last_dp is not None
+            and abs(current_dp - self._last_dp) < 0.3
+            and current_dp < self.dew_point_threshold_c - 2 * self.hysteresis_c
+        )
+        if stable and not self.relay.is_on:
+            self._interval = min(self._interval * 1.5, self.max_sensor_read_interval_seconds)
         else:
-            # Check Minimum Run Time
-            if (current_time - self.fan_on_timestamp) < self.min_fan_runtime_seconds:
-                print(f"Controller: Fan ON (Min runtime: {int(self.min_fan_runtime_seconds - (current_time - self.fan_on_timestamp))}s left). DP: {current_dp:.2f}°C")
-                pass # Do nothing, let it run for min time
-
-            # Check Maximum Run Time
-            elif (current_time - self.fan_on_timestamp) > self.max_fan_runtime_seconds:
-                self.relay.off()
-                self.fan_on_timestamp = 0 # Reset
-                print(f"Controller: Max fan runtime ({self.max_fan_runtime_seconds}s) reached. Turning fan OFF (DP: {current_dp:.2f}°C).")
-
-            # Check Dew Point for Turning OFF (with Hysteresis)
-            elif current_dp < (self.dew_point_threshold_c - self.hysteresis_c):
-                self.relay.off()
-                self.fan_on_timestamp = 0 # Reset
-                print(f"Controller: Dew Point ({current_dp:.2f}°C) < (Threshold - Hysteresis) ({self.dew_point_threshold_c - self.hysteresis_c:.1f}°C). Turning fan OFF.")
-            
-            else:
-                # Fan is ON, within min/max runtime, and DP is between threshold and hysteresis
-                print(f"Controller: Fan ON. DP ({current_dp:.2f}°C) within hysteresis range.")
-                pass
-
-
-    def start(self):
-        """Starts the main control loop."""
+            self._interval = self.sensor_read_interval_seconds
+        self._last_dp = current_dp
+
+    def _on_alert(self):
+        """Called from the GPIO notification thread when the ALERT line triggers."""
+        # Read both once, start() may reset them concurrently when it exits
+        loop, event = self._loop, self._alert_event
+        if loop and event:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass # Event loop already closed, the control loop is shutting down
+
+    async def _wait_for_next_read(self):
+        """Sleeps for the current interval, or until the ALERT line triggers if one is configured."""
+        if self._alert_event is None:
+            await asyncio.sleep(self._interval)
+            return
+
+        try:
+            await asyncio.wait_for(self._alert_event.wait(), self._interval)
+            log.info("Controller: Sensor alert triggered. Reading sensor now.")
+            self._interval = self.sensor_read_interval_seconds
+        except asyncio.TimeoutError:
+            pass
+        self._alert_event.clear()
+
+    async def start(self):
+        """Starts the main control loop. Sensor I/O runs in a worker thread."""
         if not (self.sensor and self.relay):
             raise RuntimeError("Controller not properly initialized. Use 'with VentController(...)'")
 
         self._running = True
-        print("Controller: Starting main loop. Press Ctrl+C to stop.")
+        if self.alert:
+            self._loop = asyncio.get_running_loop()
+            self._alert_event = asyncio.Event()
+        log.info("Controller: Starting main loop. Press Ctrl+C to stop.")
         try:
             while self._running:
-                humidity, temperature = self.sensor.get_humidity_temperature()
+                humidity, temperature = await asyncio.to_thread(self.sensor.get_humidity_temperature)
                 current_dew_point = calculate_dew_point(temperature, humidity)
                 
-                print(f"Sensor: T={temperature:.2f}°C, RH={humidity:.2f}%, DP={current_dew_point:.2f}°C. Fan: {self.relay.get_state().upper()}")
+                if current_dew_point is not None: # Invalid readings are reported by _evaluate_fan_state
+                    log.debug("Sensor: T=%.2f°C, RH=%.2f%%, DP=%.2f°C. Fan: %s", temperature, humidity, current_dew_point, self.relay.get_state().upper())
                 
+                self._update_trend(temperature, humidity, current_dew_point)
                 self._evaluate_fan_state(temperature, humidity, current_dew_point)
-                time.sleep(self.sensor_read_interval_seconds)
-        except KeyboardInterrupt:
-            print("\nController: Ctrl+C detected. Stopping loop.")
+                self._update_interval(current_dew_point)
+                await self._wait_for_next_read()
+        except asyncio.CancelledError:
+            log.info("Controller: Loop cancelled. Stopping loop.")
+            raise
         except Exception as e:
-            print(f"Controller: An error occurred in the main loop: {e}")
+            log.exception("Controller: An error occurred in the main loop: %s", e)
         finally:
+            self._loop = None # Event loop is closed once start() returns
+            self._alert_event = None
             self.stop() # Ensure cleanup when loop exits
 
     def stop(self):
@@ -167,4 +331,4 @@ class VentController:
         self._running = False
         if self.relay:
             self.relay.off()
-            print("Controller: Fan ensured OFF on stop.")
+            log.info("Controller: Fan ensured OFF on stop.")